@@ -1,40 +1,162 @@
 #!/usr/bin/env python3
-import argparse
+from __future__ import annotations
+
 import json
-from copy import deepcopy
+import mmap
 import os
+import re
+import stat
+import sys
+import tempfile
 from pathlib import Path
-from typing import Any, Dict, List
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set, Tuple
+
+if TYPE_CHECKING:
+    import argparse
 
 OPENCLAW_HOME = Path(os.environ.get("OPENCLAW_HOME", str(Path.home() / ".openclaw")))
 WORKSPACE_ROOT = OPENCLAW_HOME / "workspace"
 CONFIG_PATH = OPENCLAW_HOME / "openclaw.json"
 PLUGIN_ID = "qq-automation-manager"
+MANAGER_DEFAULTS: Dict[str, Any] = {
+    "enabled": True,
+    "configVersion": 1,
+    "reconcileOnStartup": True,
+    "reconcileIntervalMs": 120000,
+    "pruneOrphans": False,
+    "strictAgentOnly": True,
+}
+ROUTE_PREFIXES = ("user:", "group:", "guild:")
+MMAP_THRESHOLD = 16 * 4096
+LONG_DIGIT_RUN = re.compile(rb"\d{19}")
+MUTATING_CMDS = ("upsert", "disable", "remove", "migrate-agent-only")
+FLAG_ONLY_CMDS = {"list": (), "audit": (), "migrate-agent-only": ("--durable",)}
+LATEST_REQUIRED_FIELDS = ("triggered", "produced", "skipped", "sent_by_channel", "trace")
+LATEST_PREVIEW_FIELDS = ("ts", "target_id", "triggered", "produced", "skipped", "sent_by_channel", "trace")
+
+
+def import_orjson() -> Any:
+    try:
+        import orjson
+    except ImportError:
+        return None
+    return orjson
+
+
+def json_dumps(obj: Any, indent: bool = True) -> bytes:
+    text = json.dumps(obj, ensure_ascii=False, indent=2 if indent else None)
+    return (text + "\n").encode("utf-8")
+
+
+def emit(obj: Any, indent: bool = True) -> None:
+    sys.stdout.buffer.write(json_dumps(obj, indent=indent))
+
+
+def read_fd(fd: int, size: int) -> bytes:
+    buf = os.read(fd, size)
+    while len(buf) < size:
+        chunk = os.read(fd, size - len(buf))
+        if not chunk:
+            break
+        buf += chunk
+    return buf
+
+
+def read_bytes(path: Path) -> bytes:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        return read_fd(fd, os.fstat(fd).st_size)
+    finally:
+        os.close(fd)
+
+
+def current_umask() -> int:
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+def write_bytes(path: Path, data: bytes, durable: bool = False) -> None:
+    path = Path(os.path.realpath(path))
+    try:
+        st: Optional[os.stat_result] = os.stat(path)
+    except FileNotFoundError:
+        st = None
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".")
+    try:
+        try:
+            os.fchmod(fd, stat.S_IMODE(st.st_mode) if st else 0o666 & ~current_umask())
+            if st and (st.st_uid, st.st_gid) != (os.geteuid(), os.getegid()):
+                try:
+                    os.fchown(fd, st.st_uid, st.st_gid)
+                except PermissionError:
+                    pass
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+            if durable:
+                os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+    if durable:
+        dir_fd = os.open(path.parent, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
 
 
 def load_config() -> Dict[str, Any]:
-    raw = CONFIG_PATH.read_text(encoding="utf-8")
-    return json.loads(raw)
-
-
-def save_config(cfg: Dict[str, Any]) -> None:
-    CONFIG_PATH.write_text(json.dumps(cfg, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    fd = os.open(CONFIG_PATH, os.O_RDONLY)
+    try:
+        size = os.fstat(fd).st_size
+        orjson = import_orjson() if size >= MMAP_THRESHOLD else None
+        if orjson is not None:
+            # orjson parses the mapped pages in place; they are page cache, so a
+            # larger RSS while parsing is file-backed memory, not a leak.
+            # It rejects NaN/Infinity and turns integers wider than 64 bits into
+            # floats, so those configs go through json.loads like small ones.
+            with mmap.mmap(fd, size, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+                if not LONG_DIGIT_RUN.search(mm):
+                    try:
+                        return orjson.loads(view)
+                    except orjson.JSONDecodeError:
+                        pass
+                return json.loads(mm[:])
+        return json.loads(read_fd(fd, size))
+    finally:
+        os.close(fd)
+
+
+def save_config(cfg: Dict[str, Any], durable: bool = False) -> None:
+    write_bytes(CONFIG_PATH, json_dumps(cfg), durable=durable)
+
+
+def child_dict(parent: Dict[str, Any], key: str) -> Dict[str, Any]:
+    value = parent.get(key)
+    if value is None:
+        value = parent[key] = {}
+    return value
 
 
 def ensure_manager_config(cfg: Dict[str, Any]) -> Dict[str, Any]:
-    plugins = cfg.setdefault("plugins", {})
-    entries = plugins.setdefault("entries", {})
-    manager_entry = entries.setdefault(PLUGIN_ID, {"enabled": True, "config": {}})
-    if "enabled" not in manager_entry:
-        manager_entry["enabled"] = True
-    manager_cfg = manager_entry.setdefault("config", {})
-    manager_cfg.setdefault("enabled", True)
-    manager_cfg.setdefault("configVersion", 1)
-    manager_cfg.setdefault("reconcileOnStartup", True)
-    manager_cfg.setdefault("reconcileIntervalMs", 120000)
-    manager_cfg.setdefault("pruneOrphans", False)
-    manager_cfg.setdefault("targets", [])
-    if not isinstance(manager_cfg["targets"], list):
+    manager_entry = child_dict(child_dict(child_dict(cfg, "plugins"), "entries"), PLUGIN_ID)
+    manager_entry.setdefault("enabled", True)
+    manager_cfg = manager_entry.get("config")
+    if not isinstance(manager_cfg, dict):
+        manager_cfg = manager_entry["config"] = {}
+    for key, value in MANAGER_DEFAULTS.items():
+        if key not in manager_cfg:
+            manager_cfg[key] = value
+    if not isinstance(manager_cfg.get("targets"), list):
         manager_cfg["targets"] = []
     return manager_cfg
 
@@ -43,8 +165,12 @@ def route_to_default_id(route: str) -> str:
     return route.replace(":", "-")
 
 
+def is_valid_route(route: str) -> bool:
+    return route[:1] in ("u", "g") and route.startswith(ROUTE_PREFIXES)
+
+
 def validate_route(route: str) -> None:
-    if not route.startswith(("user:", "group:", "guild:")):
+    if not is_valid_route(route):
         raise SystemExit(f"invalid route: {route}")
 
 
@@ -78,84 +204,119 @@ def build_target(args: argparse.Namespace) -> Dict[str, Any]:
     }
 
 
-def list_targets(targets: List[Dict[str, Any]]) -> None:
+def list_targets(targets: List[Dict[str, Any]]) -> Dict[str, Any]:
     rows = []
+    rows_append = rows.append
     for t in targets:
-        schedule = (t.get("job", {}).get("schedule", {}) or {}).get("expr", "")
-        enabled = bool(t.get("enabled", False))
-        route = t.get("route", "")
-        rows.append(
+        get = t.get
+        schedule = (get("job") or {}).get("schedule") or {}
+        rows_append(
             {
-                "id": t.get("id", ""),
-                "enabled": enabled,
-                "route": route,
-                "cron": schedule,
+                "id": get("id", ""),
+                "enabled": bool(get("enabled", False)),
+                "route": get("route", ""),
+                "cron": schedule.get("expr", ""),
             }
         )
-    print(json.dumps({"targets": rows}, ensure_ascii=False, indent=2))
+    return {"targets": rows}
 
 
-def upsert_target(targets: List[Dict[str, Any]], item: Dict[str, Any]) -> str:
-    item_id = item["id"]
+def index_targets(targets: List[Dict[str, Any]], key: str = "id") -> Dict[str, int]:
+    index: Dict[str, int] = {}
     for i, t in enumerate(targets):
-        if str(t.get("id", "")) == item_id:
-            targets[i] = item
-            return "updated"
+        index.setdefault(str(t.get(key, "")), i)
+    return index
+
+
+def upsert_target(targets: List[Dict[str, Any]], index: Dict[str, int], item: Dict[str, Any]) -> str:
+    item_id = item["id"]
+    idx = index.get(item_id)
+    if idx is not None:
+        targets[idx] = item
+        return "updated"
+    index[item_id] = len(targets)
     targets.append(item)
     return "created"
 
 
-def disable_target(targets: List[Dict[str, Any]], target_id: str) -> bool:
-    for t in targets:
-        if str(t.get("id", "")) == target_id:
-            t["enabled"] = False
-            return True
-    return False
+def disable_target(targets: List[Dict[str, Any]], index: Dict[str, int], target_id: str) -> bool:
+    idx = index.get(target_id)
+    if idx is None:
+        return False
+    targets[idx]["enabled"] = False
+    return True
 
 
-def remove_target(targets: List[Dict[str, Any]], target_id: str) -> bool:
-    for i, t in enumerate(targets):
-        if str(t.get("id", "")) == target_id:
-            del targets[i]
-            return True
-    return False
+def remove_target(targets: List[Dict[str, Any]], index: Dict[str, int], target_id: str) -> bool:
+    idx = index.pop(target_id, None)
+    if idx is None:
+        return False
+    del targets[idx]
+    for i in range(idx, len(targets)):
+        key = str(targets[i].get("id", ""))
+        if index.get(key, i + 1) == i + 1:
+            index[key] = i
+    return True
 
 
-def migrate_agent_only(targets: List[Dict[str, Any]]) -> int:
+def migrate_and_audit(targets: List[Dict[str, Any]], *, fix: bool) -> Tuple[int, Dict[str, Any]]:
     changed = 0
-    for t in targets:
-        if t.get("executionMode") != "agent-only":
-            t["executionMode"] = "agent-only"
-            changed += 1
-        if "delivery" in t:
-            t.pop("delivery", None)
-            changed += 1
-    return changed
-
-
-def audit_targets(targets: List[Dict[str, Any]]) -> Dict[str, Any]:
     issues = []
+    issues_append = issues.append
     for t in targets:
-        tid = str(t.get("id", ""))
-        if t.get("executionMode") != "agent-only":
-            issues.append({"id": tid, "issue": "executionMode_not_agent_only"})
+        get = t.get
+        tid = str(get("id", ""))
+        if get("executionMode") != "agent-only":
+            if fix:
+                t["executionMode"] = "agent-only"
+                changed += 1
+            else:
+                issues_append({"id": tid, "issue": "executionMode_not_agent_only"})
         if "delivery" in t:
-            issues.append({"id": tid, "issue": "delivery_present"})
-    return {"ok": len(issues) == 0, "issues": issues}
+            if fix:
+                del t["delivery"]
+                changed += 1
+            else:
+                issues_append({"id": tid, "issue": "delivery_present"})
+    return changed, {"ok": len(issues) == 0, "issues": issues}
 
 
 def route_meta_dir(route: str) -> Path:
-    direct = WORKSPACE_ROOT / "qq_sessions" / route / "meta"
-    normalized = WORKSPACE_ROOT / "qq_sessions" / route.replace(":", "__") / "meta"
-    return direct if direct.exists() else normalized
-
-
-def verify_target(targets: List[Dict[str, Any]], target_id: str = "", route: str = "") -> Dict[str, Any]:
+    sessions = WORKSPACE_ROOT / "qq_sessions"
+    direct = sessions / route / "meta"
+    try:
+        os.stat(direct)
+        return direct
+    except OSError:
+        return sessions / route.replace(":", "__") / "meta"
+
+
+def list_dir_names(path: Path) -> Set[str]:
+    try:
+        with os.scandir(path) as it:
+            return {entry.name for entry in it}
+    except OSError:
+        return set()
+
+
+def verify_target(
+    targets: List[Dict[str, Any]],
+    target_id: str = "",
+    route: str = "",
+    id_index: Optional[Dict[str, int]] = None,
+    route_index: Optional[Dict[str, int]] = None,
+) -> Dict[str, Any]:
     selected = None
     if target_id:
-        selected = next((t for t in targets if str(t.get("id", "")) == target_id), None)
+        if id_index is None:
+            id_index = index_targets(targets)
+        idx = id_index.get(target_id)
+        selected = targets[idx] if idx is not None else None
     elif route:
-        selected = next((t for t in targets if str(t.get("route", "")) == route), None)
+        if route_index is None:
+            route_index = index_targets(targets, key="route")
+        idx = route_index.get(route)
+        selected = targets[idx] if idx is not None else None
     elif targets:
         selected = targets[0]
 
@@ -164,19 +325,17 @@ def verify_target(targets: List[Dict[str, Any]], target_id: str = "", route: str
 
     s = selected.get("job", {}).get("schedule", {}) or {}
     meta = route_meta_dir(str(selected.get("route", "")))
-    latest = meta / "automation-latest.json"
-    ndjson = meta / "automation-state.ndjson"
+    meta_entries = list_dir_names(meta)
 
     latest_ok = False
     latest_fields_ok = False
     latest_preview: Dict[str, Any] = {}
-    if latest.exists():
+    if "automation-latest.json" in meta_entries:
         try:
-            payload = json.loads(latest.read_text(encoding="utf-8"))
-            required = {"triggered", "produced", "skipped", "sent_by_channel", "trace"}
+            payload = json.loads(read_bytes(meta / "automation-latest.json"))
+            latest_preview = {k: payload.get(k) for k in LATEST_PREVIEW_FIELDS}
             latest_ok = True
-            latest_fields_ok = required.issubset(set(payload.keys()))
-            latest_preview = {k: payload.get(k) for k in ["ts", "target_id", "triggered", "produced", "skipped", "sent_by_channel", "trace"]}
+            latest_fields_ok = all(k in payload for k in LATEST_REQUIRED_FIELDS)
         except Exception:
             latest_ok = False
 
@@ -196,96 +355,191 @@ def verify_target(targets: List[Dict[str, Any]], target_id: str = "", route: str
             "meta_dir": str(meta),
             "automation_latest_exists": latest_ok,
             "automation_latest_required_fields": latest_fields_ok,
-            "automation_state_ndjson_exists": ndjson.exists(),
+            "automation_state_ndjson_exists": "automation-state.ndjson" in meta_entries,
         },
         "latest_preview": latest_preview,
     }
 
 
-def main() -> None:
-    parser = argparse.ArgumentParser(description="Manage qq-automation-manager targets in openclaw.json")
+def op_to_argv(op: Dict[str, Any]) -> List[str]:
+    argv = [str(op.get("op", ""))]
+    for key, value in op.items():
+        if key == "op" or value is None:
+            continue
+        flag = key.replace("_", "-")
+        if isinstance(value, bool):
+            argv.append(f"--{flag}" if value else f"--no-{flag}")
+        else:
+            argv.append(f"--{flag}={value}")
+    return argv
+
+
+def read_batch_ops(path: str) -> List[Tuple[int, Dict[str, Any]]]:
+    raw = sys.stdin.read() if path == "-" else Path(path).read_text(encoding="utf-8")
+    ops = []
+    for lineno, line in enumerate(raw.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            op = json.loads(line)
+        except ValueError:
+            raise SystemExit(f"invalid batch op at line {lineno}: {line.strip()}")
+        if not isinstance(op, dict) or op.get("op") not in MUTATING_CMDS:
+            raise SystemExit(f"invalid batch op at line {lineno}: {line.strip()}")
+        ops.append((lineno, op))
+    return ops
+
+
+CommandResult = Tuple[Dict[str, Any], bool]
+
+
+def cmd_list(args: argparse.Namespace, targets: List[Dict[str, Any]], index: Dict[str, int]) -> CommandResult:
+    return list_targets(targets), False
+
+
+def cmd_audit(args: argparse.Namespace, targets: List[Dict[str, Any]], index: Dict[str, int]) -> CommandResult:
+    return migrate_and_audit(targets, fix=False)[1], False
+
+
+def cmd_verify(args: argparse.Namespace, targets: List[Dict[str, Any]], index: Dict[str, int]) -> CommandResult:
+    return verify_target(targets, target_id=args.id, route=args.route, id_index=index), False
+
+
+def cmd_migrate(args: argparse.Namespace, targets: List[Dict[str, Any]], index: Dict[str, int]) -> CommandResult:
+    changed = migrate_and_audit(targets, fix=True)[0]
+    return {"ok": True, "action": "migrated", "changed": changed}, changed > 0
+
+
+def cmd_upsert(args: argparse.Namespace, targets: List[Dict[str, Any]], index: Dict[str, int]) -> CommandResult:
+    if args.random_max < args.random_min:
+        raise SystemExit("--random-max must be >= --random-min")
+    target = build_target(args)
+    action = upsert_target(targets, index, target)
+    return {"ok": True, "action": action, "id": target["id"], "route": target["route"]}, True
+
+
+def cmd_disable(args: argparse.Namespace, targets: List[Dict[str, Any]], index: Dict[str, int]) -> CommandResult:
+    if not disable_target(targets, index, args.id):
+        raise SystemExit(f"target not found: {args.id}")
+    return {"ok": True, "action": "disabled", "id": args.id}, True
+
+
+def cmd_remove(args: argparse.Namespace, targets: List[Dict[str, Any]], index: Dict[str, int]) -> CommandResult:
+    if not remove_target(targets, index, args.id):
+        raise SystemExit(f"target not found: {args.id}")
+    return {"ok": True, "action": "removed", "id": args.id}, True
+
+
+def cmd_batch(args: argparse.Namespace, targets: List[Dict[str, Any]], index: Dict[str, int]) -> CommandResult:
+    parsers: Dict[str, argparse.ArgumentParser] = {}
+    results = []
+    dirty = False
+    for lineno, op in read_batch_ops(args.file):
+        op_cmd = op["op"]
+        if op_cmd not in parsers:
+            parsers[op_cmd] = build_parser(only=op_cmd, for_batch=True)
+        try:
+            op_args = parsers[op_cmd].parse_args(op_to_argv(op))
+            result, changed = COMMANDS[op_args.cmd](op_args, targets, index)
+        except SystemExit as exc:
+            raise SystemExit(f"batch op at line {lineno} failed: {exc.code}")
+        results.append(result)
+        dirty = dirty or changed
+    return {"ok": True, "action": "batch", "results": results}, dirty
+
+
+COMMANDS = {
+    "list": cmd_list,
+    "audit": cmd_audit,
+    "verify": cmd_verify,
+    "migrate-agent-only": cmd_migrate,
+    "upsert": cmd_upsert,
+    "disable": cmd_disable,
+    "remove": cmd_remove,
+    "batch": cmd_batch,
+}
+
+
+def build_parser(only: Optional[str] = None, for_batch: bool = False) -> argparse.ArgumentParser:
+    import argparse
+
+    parser_class = argparse.ArgumentParser
+    if for_batch:
+        class BatchOpParser(argparse.ArgumentParser):
+            def __init__(self, *args: Any, **kwargs: Any) -> None:
+                kwargs["allow_abbrev"] = False
+                super().__init__(*args, **kwargs)
+
+            def error(self, message: str) -> None:
+                raise SystemExit(f"{self.prog}: {message}")
+
+        parser_class = BatchOpParser
+
+    parser = parser_class(description="Manage qq-automation-manager targets in openclaw.json")
     sub = parser.add_subparsers(dest="cmd", required=True)
+    write_opts = argparse.ArgumentParser(add_help=False)
+    write_opts.add_argument("--durable", action="store_true", help="fsync openclaw.json after writing")
+
+    if only in (None, "list"):
+        sub.add_parser("list")
+
+    if only in (None, "upsert"):
+        upsert = sub.add_parser("upsert", parents=[write_opts])
+        upsert.add_argument("--id", default="")
+        upsert.add_argument("--route", required=True)
+        upsert.add_argument("--cron", required=True, help='e.g. "*/30 9-22 * * 1-5"')
+        upsert.add_argument("--tz", default="Asia/Shanghai")
+        upsert.add_argument("--message", required=True)
+        upsert.add_argument("--thinking", default="low")
+        upsert.add_argument("--timeout-seconds", type=int, default=600)
+        upsert.add_argument("--enabled", action=argparse.BooleanOptionalAction, default=True)
+        upsert.add_argument("--min-silence", type=int, default=30)
+        upsert.add_argument("--active-window", type=int, default=25)
+        upsert.add_argument("--random-min", type=int, default=30)
+        upsert.add_argument("--random-max", type=int, default=60)
+        upsert.add_argument("--max-chars", type=int, default=36)
+
+    if only in (None, "disable"):
+        disable = sub.add_parser("disable", parents=[write_opts])
+        disable.add_argument("--id", required=True)
+
+    if only in (None, "remove"):
+        remove = sub.add_parser("remove", parents=[write_opts])
+        remove.add_argument("--id", required=True)
+
+    if only in (None, "migrate-agent-only"):
+        sub.add_parser("migrate-agent-only", parents=[write_opts])
+
+    if only in (None, "audit"):
+        sub.add_parser("audit")
+
+    if only in (None, "verify"):
+        verify = sub.add_parser("verify")
+        verify.add_argument("--id", default="")
+        verify.add_argument("--route", default="")
+
+    if only in (None, "batch"):
+        batch = sub.add_parser("batch", parents=[write_opts], help="apply NDJSON ops, one {\"op\": ...} object per line")
+        batch.add_argument("--file", default="-", help="NDJSON file, - for stdin")
+    return parser
+
+
+def parse_args(argv: List[str]) -> Any:
+    cmd = argv[0] if argv else ""
+    flags = FLAG_ONLY_CMDS.get(cmd)
+    if flags is not None and all(a in flags for a in argv[1:]):
+        return SimpleNamespace(cmd=cmd, durable="--durable" in argv)
+    return build_parser(only=cmd if cmd in COMMANDS else None).parse_args(argv)
 
-    sub.add_parser("list")
-
-    upsert = sub.add_parser("upsert")
-    upsert.add_argument("--id", default="")
-    upsert.add_argument("--route", required=True)
-    upsert.add_argument("--cron", required=True, help='e.g. "*/30 9-22 * * 1-5"')
-    upsert.add_argument("--tz", default="Asia/Shanghai")
-    upsert.add_argument("--message", required=True)
-    upsert.add_argument("--thinking", default="low")
-    upsert.add_argument("--timeout-seconds", type=int, default=600)
-    upsert.add_argument("--enabled", action=argparse.BooleanOptionalAction, default=True)
-    upsert.add_argument("--min-silence", type=int, default=30)
-    upsert.add_argument("--active-window", type=int, default=25)
-    upsert.add_argument("--random-min", type=int, default=30)
-    upsert.add_argument("--random-max", type=int, default=60)
-    upsert.add_argument("--max-chars", type=int, default=36)
-
-    disable = sub.add_parser("disable")
-    disable.add_argument("--id", required=True)
-
-    remove = sub.add_parser("remove")
-    remove.add_argument("--id", required=True)
-
-    sub.add_parser("migrate-agent-only")
-    sub.add_parser("audit")
-    verify = sub.add_parser("verify")
-    verify.add_argument("--id", default="")
-    verify.add_argument("--route", default="")
-
-    args = parser.parse_args()
+
+def main() -> None:
+    args = parse_args(sys.argv[1:])
     cfg = load_config()
-    original = deepcopy(cfg)
-    manager_cfg = ensure_manager_config(cfg)
-    targets = manager_cfg["targets"]
-
-    if args.cmd == "list":
-        list_targets(targets)
-        return
-
-    if args.cmd == "audit":
-        print(json.dumps(audit_targets(targets), ensure_ascii=False, indent=2))
-        return
-
-    if args.cmd == "migrate-agent-only":
-        changed = migrate_agent_only(targets)
-        save_config(cfg)
-        print(json.dumps({"ok": True, "action": "migrated", "changed": changed}, ensure_ascii=False))
-        return
-
-    if args.cmd == "verify":
-        print(json.dumps(verify_target(targets, target_id=args.id, route=args.route), ensure_ascii=False, indent=2))
-        return
-
-    if args.cmd == "upsert":
-        if args.random_max < args.random_min:
-            raise SystemExit("--random-max must be >= --random-min")
-        target = build_target(args)
-        action = upsert_target(targets, target)
-        save_config(cfg)
-        print(json.dumps({"ok": True, "action": action, "id": target["id"], "route": target["route"]}, ensure_ascii=False))
-        return
-
-    if args.cmd == "disable":
-        ok = disable_target(targets, args.id)
-        if not ok:
-            raise SystemExit(f"target not found: {args.id}")
-        save_config(cfg)
-        print(json.dumps({"ok": True, "action": "disabled", "id": args.id}, ensure_ascii=False))
-        return
-
-    if args.cmd == "remove":
-        ok = remove_target(targets, args.id)
-        if not ok:
-            raise SystemExit(f"target not found: {args.id}")
-        save_config(cfg)
-        print(json.dumps({"ok": True, "action": "removed", "id": args.id}, ensure_ascii=False))
-        return
-
-    if cfg != original:
-        save_config(cfg)
+    targets = ensure_manager_config(cfg)["targets"]
+    payload, dirty = COMMANDS[args.cmd](args, targets, index_targets(targets))
+    if dirty:
+        save_config(cfg, durable=args.durable)
+    emit(payload, indent=args.cmd not in MUTATING_CMDS)
 
 
 if __name__ == "__main__":
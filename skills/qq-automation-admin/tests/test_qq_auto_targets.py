@@ -0,0 +1,386 @@
+import importlib.util
+import io
+import json
+import os
+import stat
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+SCRIPT = Path(__file__).resolve().parent.parent / "scripts" / "qq_auto_targets.py"
+spec = importlib.util.spec_from_file_location("qq_auto_targets", SCRIPT)
+qat = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(qat)
+
+
+def target(target_id, route="user:123456"):
+    return {"id": target_id, "route": route, "executionMode": "agent-only"}
+
+
+def manager_config(targets, **extra):
+    return {**extra, "plugins": {"entries": {qat.PLUGIN_ID: {"config": {"targets": targets}}}}}
+
+
+def run_main(config_path, *argv):
+    stdout = io.TextIOWrapper(io.BytesIO(), encoding="utf-8")
+    with mock.patch.object(qat, "CONFIG_PATH", config_path), mock.patch.object(sys, "argv", ["qq_auto_targets.py", *argv]), mock.patch.object(sys, "stdout", stdout):
+        qat.main()
+    stdout.flush()
+    return stdout.buffer.getvalue().decode("utf-8")
+
+
+class TempDirTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.addCleanup(self.tmp.cleanup)
+        self.config_path = self.dir / "openclaw.json"
+
+
+class IndexTargetsTest(unittest.TestCase):
+    def test_duplicate_ids_index_first_match(self):
+        targets = [target("a"), target("b"), target("a", "user:654321")]
+        self.assertEqual(qat.index_targets(targets), {"a": 0, "b": 1})
+
+    def test_remove_duplicate_id_then_lookup(self):
+        targets = [target("a", "user:111111"), target("b"), target("a", "user:222222"), target("c")]
+        index = qat.index_targets(targets)
+
+        self.assertTrue(qat.remove_target(targets, index, "a"))
+        self.assertEqual(index, qat.index_targets(targets))
+        self.assertEqual(targets[index["a"]]["route"], "user:222222")
+
+        self.assertTrue(qat.remove_target(targets, index, "a"))
+        self.assertEqual(index, qat.index_targets(targets))
+        self.assertNotIn("a", index)
+        self.assertFalse(qat.remove_target(targets, index, "a"))
+        self.assertEqual([t["id"] for t in targets], ["b", "c"])
+
+    def test_remove_keeps_earlier_entries(self):
+        targets = [target("a"), target("b"), target("c"), target("b")]
+        index = qat.index_targets(targets)
+
+        self.assertTrue(qat.remove_target(targets, index, "a"))
+        self.assertEqual(index, {"b": 0, "c": 1})
+        self.assertTrue(qat.disable_target(targets, index, "b"))
+        self.assertIs(targets[0]["enabled"], False)
+        self.assertNotIn("enabled", targets[2])
+
+
+class BatchTest(unittest.TestCase):
+    def run_batch(self, targets, lines):
+        index = qat.index_targets(targets)
+        stdin = io.StringIO("\n".join(lines) + "\n")
+        with mock.patch.object(sys, "stdin", stdin):
+            payload, dirty = qat.cmd_batch(SimpleNamespace(file="-"), targets, index)
+        return payload, dirty, index
+
+    def test_ops_share_one_index(self):
+        targets = [target("a"), target("b")]
+        payload, dirty, index = self.run_batch(
+            targets,
+            [
+                '{"op": "upsert", "route": "user:777777", "cron": "0 9 * * *", "message": "hi"}',
+                '{"op": "remove", "id": "a"}',
+                '{"op": "disable", "id": "user-777777"}',
+                '{"op": "upsert", "id": "b", "route": "group:888888", "cron": "0 9 * * *", "message": "hi"}',
+            ],
+        )
+
+        self.assertTrue(dirty)
+        self.assertEqual([r["action"] for r in payload["results"]], ["created", "removed", "disabled", "updated"])
+        self.assertEqual([t["id"] for t in targets], ["b", "user-777777"])
+        self.assertEqual(index, qat.index_targets(targets))
+        self.assertIs(targets[1]["enabled"], False)
+        self.assertEqual(targets[0]["route"], "group:888888")
+
+    def assert_batch_fails(self, lines, *fragments):
+        with self.assertRaises(SystemExit) as ctx:
+            self.run_batch([target("a")], lines)
+        for fragment in fragments:
+            self.assertIn(fragment, str(ctx.exception.code))
+
+    def test_null_field_uses_default_and_dash_value_is_kept(self):
+        targets = []
+        self.run_batch(
+            targets,
+            ['{"op": "upsert", "id": null, "route": "user:777777", "cron": "0 9 * * *", "message": "-hi"}'],
+        )
+        self.assertEqual(targets[0]["id"], "user-777777")
+        self.assertEqual(targets[0]["job"]["message"], "-hi")
+
+    def test_malformed_line_reports_line_number(self):
+        self.assert_batch_fails(['{"op": "disable", "id": "a"}', '{"op": "upsert",'], "line 2")
+
+    def test_unsupported_op_is_rejected(self):
+        self.assert_batch_fails(['{"op": "verify"}'], "line 1")
+
+    def test_abbreviated_field_is_rejected(self):
+        self.assert_batch_fails(
+            ['{"op": "upsert", "route": "user:777777", "cron": "0 9 * * *", "message": "m", "mes": "x"}'],
+            "line 1",
+            "--mes=x",
+        )
+
+    def test_failing_op_reports_line_number(self):
+        self.assert_batch_fails(['{"op": "disable", "id": "a"}', '{"op": "remove", "id": "nope"}'], "line 2", "target not found: nope")
+        self.assert_batch_fails(
+            ['{"op": "upsert", "route": "user:777777", "cron": "0 9 * * *", "message": "m", "timeoutSeconds": 5}'],
+            "line 1",
+            "--timeoutSeconds=5",
+        )
+
+
+class ConfigSaveTest(TempDirTestCase):
+    RAW = '{"huge": 12345678901234567890123, "nan": NaN, "small": 1e-05, "big": 1e+20, "plugins": {}}'
+
+    def test_save_keeps_values_stdlib_json_accepts(self):
+        self.config_path.write_text(self.RAW, encoding="utf-8")
+        run_main(self.config_path, "upsert", "--route", "user:123456", "--cron", "0 9 * * *", "--message", "hi")
+
+        saved = self.config_path.read_text(encoding="utf-8")
+        self.assertIn('"huge": 12345678901234567890123', saved)
+        self.assertIn('"nan": NaN', saved)
+        self.assertIn('"small": 1e-05', saved)
+        self.assertIn('"big": 1e+20', saved)
+        self.assertEqual(saved, json.dumps(json.loads(saved), ensure_ascii=False, indent=2) + "\n")
+
+    def test_write_command_output_uses_default_separators(self):
+        self.config_path.write_text(json.dumps(manager_config([target("a")])), encoding="utf-8")
+        out = run_main(self.config_path, "disable", "--id", "a")
+        self.assertEqual(out, '{"ok": true, "action": "disabled", "id": "a"}\n')
+
+
+class LargeConfigLoadTest(TempDirTestCase):
+    def write_large_config(self, extra_raw=""):
+        targets = [target(f"t{i}", f"user:{100000 + i}") for i in range(2000)]
+        raw = json.dumps(manager_config(targets))
+        raw = "{" + extra_raw + raw[1:]
+        self.config_path.write_text(raw, encoding="utf-8")
+        self.assertGreaterEqual(self.config_path.stat().st_size, qat.MMAP_THRESHOLD)
+        return raw
+
+    def load(self):
+        with mock.patch.object(qat, "CONFIG_PATH", self.config_path):
+            return qat.load_config()
+
+    @unittest.skipIf(qat.import_orjson() is None, "orjson not installed")
+    def test_large_config_is_parsed_from_mmap_with_orjson(self):
+        raw = self.write_large_config()
+        orjson = qat.import_orjson()
+        with mock.patch.object(orjson, "loads", wraps=orjson.loads) as loads:
+            cfg = self.load()
+        self.assertEqual(loads.call_count, 1)
+        self.assertEqual(cfg, json.loads(raw))
+
+    def test_large_config_accepts_what_json_loads_accepts(self):
+        raw = self.write_large_config('"nan": NaN, "inf": 1e400, "huge": 12345678901234567890123, "low": -9223372036854775809, ')
+        cfg = self.load()
+        self.assertEqual(cfg["huge"], 12345678901234567890123)
+        self.assertEqual(cfg["low"], -9223372036854775809)
+        self.assertEqual(json.dumps(cfg), json.dumps(json.loads(raw)))
+
+    def test_read_only_command_works_on_large_nan_config(self):
+        self.write_large_config('"nan": NaN, ')
+        out = json.loads(run_main(self.config_path, "audit"))
+        self.assertTrue(out["ok"])
+
+
+class RouteTest(unittest.TestCase):
+    def test_validate_route_checks_prefix(self):
+        for route in ("user:123456", "group:123456", "guild:a:b"):
+            qat.validate_route(route)
+        for route in ("", "group1", "gx:1", "u:1", "channel:1"):
+            with self.assertRaises(SystemExit):
+                qat.validate_route(route)
+
+
+class AuditTest(TempDirTestCase):
+    def test_audit_reports_only_agent_only_issues(self):
+        targets = [
+            {"id": "a", "route": "user:abc", "delivery": {}},
+            {"id": "b", "route": "guild:x", "executionMode": "agent-only"},
+        ]
+        self.config_path.write_text(json.dumps(manager_config(targets)), encoding="utf-8")
+        out = json.loads(run_main(self.config_path, "audit"))
+        self.assertEqual(
+            out,
+            {
+                "ok": False,
+                "issues": [
+                    {"id": "a", "issue": "executionMode_not_agent_only"},
+                    {"id": "a", "issue": "delivery_present"},
+                ],
+            },
+        )
+
+    def test_migrate_fixes_in_one_pass_and_audit_is_clean(self):
+        targets = [
+            {"id": "a", "route": "user:123456", "delivery": {}},
+            {"id": "b", "route": "group:123456", "executionMode": "agent-only"},
+        ]
+        self.config_path.write_text(json.dumps(manager_config(targets)), encoding="utf-8")
+
+        out = run_main(self.config_path, "migrate-agent-only")
+        self.assertEqual(out, '{"ok": true, "action": "migrated", "changed": 2}\n')
+        saved = json.loads(self.config_path.read_text(encoding="utf-8"))
+        self.assertEqual(saved["plugins"]["entries"][qat.PLUGIN_ID]["config"]["targets"][0], {"id": "a", "route": "user:123456", "executionMode": "agent-only"})
+        self.assertEqual(json.loads(run_main(self.config_path, "audit")), {"ok": True, "issues": []})
+
+    def test_migrate_without_changes_does_not_rewrite(self):
+        self.config_path.write_text(json.dumps(manager_config([target("a")])), encoding="utf-8")
+        before = self.config_path.stat().st_mtime_ns, self.config_path.stat().st_ino
+
+        out = run_main(self.config_path, "migrate-agent-only")
+        self.assertEqual(out, '{"ok": true, "action": "migrated", "changed": 0}\n')
+        self.assertEqual((self.config_path.stat().st_mtime_ns, self.config_path.stat().st_ino), before)
+
+
+class VerifyTest(TempDirTestCase):
+    RECORD = {"ts": 1, "target_id": "a", "triggered": True, "produced": True, "skipped": False, "sent_by_channel": True, "trace": {"steps": []}}
+
+    def verify(self, latest_raw, targets=None, **kwargs):
+        meta = self.dir / "qq_sessions" / "user__123456" / "meta"
+        meta.mkdir(parents=True, exist_ok=True)
+        if latest_raw is not None:
+            (meta / "automation-latest.json").write_text(latest_raw, encoding="utf-8")
+        with mock.patch.object(qat, "WORKSPACE_ROOT", self.dir):
+            return qat.verify_target(targets if targets is not None else [target("a")], **kwargs)
+
+    def test_complete_record_passes(self):
+        result = self.verify(json.dumps(self.RECORD), target_id="a")
+        self.assertTrue(result["checks"]["automation_latest_exists"])
+        self.assertTrue(result["checks"]["automation_latest_required_fields"])
+        self.assertEqual(result["latest_preview"], self.RECORD)
+
+    def test_unreadable_record_is_not_ok(self):
+        for raw in ('{"ts": 1,', '{"ts": 1} garbage', json.dumps(list(self.RECORD))):
+            result = self.verify(raw, target_id="a")
+            self.assertFalse(result["checks"]["automation_latest_exists"], raw)
+            self.assertFalse(result["checks"]["automation_latest_required_fields"], raw)
+            self.assertEqual(result["latest_preview"], {}, raw)
+
+    def test_duplicate_keys_resolve_last_wins(self):
+        raw = json.dumps(self.RECORD)[:-1] + ', "trace": "last"}'
+        self.assertEqual(self.verify(raw, target_id="a")["latest_preview"]["trace"], "last")
+
+    def test_route_lookup_uses_first_matching_target(self):
+        targets = [target("a", "user:111111"), target("b"), target("c")]
+        result = self.verify(None, targets=targets, route="user:123456")
+        self.assertEqual(result["target"]["id"], "b")
+        self.assertTrue(result["checks"]["meta_dir"].endswith("user__123456/meta"))
+
+    def test_route_lookup_uses_given_route_index(self):
+        targets = [target("a"), target("b")]
+        result = self.verify(None, targets=targets, route="user:123456", route_index={"user:123456": 1})
+        self.assertEqual(result["target"]["id"], "b")
+
+    def test_unknown_route_or_id_is_not_found(self):
+        self.assertEqual(self.verify(None, route="user:999999")["error"], "target_not_found")
+        self.assertEqual(self.verify(None, target_id="zz", id_index={"a": 0})["error"], "target_not_found")
+
+    def test_verify_command_by_route(self):
+        self.config_path.write_text(json.dumps(manager_config([target("a", "group:123456"), target("b")])), encoding="utf-8")
+        with mock.patch.object(qat, "WORKSPACE_ROOT", self.dir):
+            out = json.loads(run_main(self.config_path, "verify", "--route", "user:123456"))
+        self.assertEqual(out["target"]["id"], "b")
+
+
+class ManagerConfigTest(unittest.TestCase):
+    def test_defaults_are_merged_in_place_keeping_key_order(self):
+        cfg = manager_config([])
+        manager_cfg = cfg["plugins"]["entries"][qat.PLUGIN_ID]["config"]
+        manager_cfg["enabled"] = False
+
+        self.assertIs(qat.ensure_manager_config(cfg), manager_cfg)
+        self.assertEqual(list(manager_cfg), ["targets", "enabled", "configVersion", "reconcileOnStartup", "reconcileIntervalMs", "pruneOrphans", "strictAgentOnly"])
+        self.assertIs(manager_cfg["enabled"], False)
+
+    def test_missing_containers_and_bad_targets_are_replaced(self):
+        cfg = {}
+        manager_cfg = qat.ensure_manager_config(cfg)
+        self.assertEqual(cfg["plugins"]["entries"][qat.PLUGIN_ID], {"enabled": True, "config": manager_cfg})
+        self.assertEqual(manager_cfg["targets"], [])
+
+        cfg = {"plugins": {"entries": {qat.PLUGIN_ID: {"config": {"targets": {}}}}}}
+        self.assertEqual(qat.ensure_manager_config(cfg)["targets"], [])
+        self.assertIsNot(qat.ensure_manager_config({})["targets"], qat.ensure_manager_config({})["targets"])
+
+
+class WriteBytesTest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.config_path.write_text("{}\n", encoding="utf-8")
+        os.chmod(self.config_path, 0o600)
+
+    def test_replaces_file_and_keeps_mode(self):
+        qat.write_bytes(self.config_path, b'{"a": 1}\n')
+
+        self.assertEqual(self.config_path.read_bytes(), b'{"a": 1}\n')
+        self.assertEqual(stat.S_IMODE(self.config_path.stat().st_mode), 0o600)
+        self.assertEqual(sorted(p.name for p in self.dir.iterdir()), ["openclaw.json"])
+
+    def test_failed_replace_keeps_original_and_removes_temp(self):
+        with mock.patch.object(qat.os, "replace", side_effect=OSError("boom")), self.assertRaises(OSError):
+            qat.write_bytes(self.config_path, b'{"a": 1}\n')
+
+        self.assertEqual(self.config_path.read_bytes(), b"{}\n")
+        self.assertEqual(sorted(p.name for p in self.dir.iterdir()), ["openclaw.json"])
+
+    def test_writers_use_distinct_temp_files(self):
+        temps = []
+        real_replace = os.replace
+
+        def record(src, dst):
+            temps.append(src)
+            real_replace(src, dst)
+
+        with mock.patch.object(qat.os, "replace", side_effect=record):
+            qat.write_bytes(self.config_path, b"1\n")
+            qat.write_bytes(self.config_path, b"2\n")
+
+        self.assertEqual(len(set(temps)), 2)
+        self.assertTrue(all(Path(t).parent == self.dir for t in temps))
+
+    def test_symlinked_config_keeps_link(self):
+        link = self.dir / "link.json"
+        link.symlink_to(self.config_path.name)
+
+        qat.write_bytes(link, b"[]\n", durable=True)
+
+        self.assertTrue(link.is_symlink())
+        self.assertEqual(self.config_path.read_bytes(), b"[]\n")
+
+
+class ParseArgsTest(unittest.TestCase):
+    def test_flag_only_commands_skip_argparse(self):
+        for argv, durable in ((["list"], False), (["audit"], False), (["migrate-agent-only", "--durable"], True)):
+            with mock.patch.object(qat, "build_parser", side_effect=AssertionError("argparse used")):
+                args = qat.parse_args(argv)
+            self.assertIsInstance(args, SimpleNamespace)
+            self.assertEqual((args.cmd, args.durable), (argv[0], durable))
+
+    def test_unknown_flag_falls_back_to_argparse(self):
+        for argv in (["list", "--bogus"], ["audit", "--durable"]):
+            with mock.patch.object(sys, "stderr", io.StringIO()), self.assertRaises(SystemExit):
+                qat.parse_args(argv)
+
+    def test_other_commands_build_only_their_subparser(self):
+        args = qat.parse_args(["disable", "--id", "a"])
+        self.assertEqual((args.cmd, args.id, args.durable), ("disable", "a", False))
+        args = qat.parse_args(["verify", "--route", "user:123456"])
+        self.assertEqual((args.cmd, args.id, args.route), ("verify", "", "user:123456"))
+
+    def test_unknown_command_lists_all_choices(self):
+        stderr = io.StringIO()
+        with mock.patch.object(sys, "stderr", stderr), self.assertRaises(SystemExit):
+            qat.parse_args(["bogus"])
+        for cmd in qat.COMMANDS:
+            self.assertIn(cmd, stderr.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()